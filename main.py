@@ -3,20 +3,19 @@ import os
 import re
 import io
 import time
+import shutil
 import json
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 import openpyxl
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Alignment
+import xlsxwriter
 
 try:
     import google.generativeai as genai
@@ -28,6 +27,16 @@ try:
 except Exception:
     jaconv = None
 
+try:
+    import regex as re_u # pip install regex
+except Exception:
+    re_u = None
+
+try:
+    import orjson # pip install orjson
+except Exception:
+    orjson = None
+
 # ===== 設定 =====
 RELEASE_TAG = "news-latest"
 ASSET_NAME = "yahoo_news.xlsx"
@@ -41,11 +50,22 @@ SHEET_NAMES = [
     "三菱自動車",
     "日産",
 ]
+SCRAPE_WORKERS = 8
+GEMINI_WORKERS = 8
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+# Yahoo検索 / GitHub API で接続を使い回し、一時的な 429/5xx は自動で再試行する
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", HTTPAdapter(max_retries=Retry(
+    total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False,
+)))
+
+KEYWORD_SPLIT_RE = re.compile(r"[,\\n]")
 
 def get_keywords() -> list[str]:
     env = os.getenv("NEWS_KEYWORDS")
     if env:
-        parts = [p.strip() for p in re.split(r"[,\\n]", env) if p.strip()]
+        parts = [p.strip() for p in KEYWORD_SPLIT_RE.split(env) if p.strip()]
         return parts or SHEET_NAMES
     return SHEET_NAMES
 
@@ -63,133 +83,135 @@ def to_hankaku_kana_ascii_digit(s: str) -> str:
         s_nfkc = jaconv.z2h(s_nfkc, kana=True, digit=True, ascii=True)
     return s_nfkc
 
+if re_u is not None:
+    TITLE_DUP_RE = re_u.compile(r'[\p{P}\p{S}\p{Z}\p{Cc}&&[^【】]]+')
+else:
+    # regex が無い場合は 1 文字単位の削除なので str.translate の表で済ませる
+    # （jaconv で半角化された ､｡･｢｣ も同じ記号として消す）
+    TITLE_DUP_TABLE = str.maketrans("", "", (
+        " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2028\u2029\u202f\u205f\u3000"
+        + "".join(chr(c) for c in range(0x2000, 0x200B))
+        + "\"'\u201C\u201D\u2018\u2019()[]{}<>"
+        + "、。・,…:;!?！？／/\\|＋+＊*.､｡･｢｣"
+        + "＜＞「」『』《》〔〕［］｛｝（）"
+        + "-\u2212\u2010\u2011\u2012\u2013\u2014\u2015\uFF0D\u30FC\uFF70"
+    ))
+
 def normalize_title_for_dup(s: str) -> str:
     if not s:
         return ""
     s = to_hankaku_kana_ascii_digit(s)
-    import regex as re_u
-    if re_u:
-        s = re_u.sub(r'[\p{P}\p{S}\p{Z}\p{Cc}&&[^【】]]+', '', s)
+    if re_u is not None:
+        s = TITLE_DUP_RE.sub("", s)
     else:
-        dash_chars = r'\\-\\u2212\\u2010\\u2011\\u2012\\u2013\\u2014\\u2015\\uFF0D\\u30FC\\uFF70'
-        pattern = (
-            r'[\\s"\'\\u201C\\u201D\\u2018\\u2019\\(\\)[\\]{}<>]'
-            r'|[、。・,…:;!?！？／/\\\\|＋+＊*.,]'
-            r'|[＜＞「」『』《》〔〕［］｛｝（）]'
-            r'|[' + dash_chars + r']'
-        )
-        s = re.sub(pattern, "", s)
+        s = s.translate(TITLE_DUP_TABLE)
     return s
 
-def normalize_date_str(date_str: str) -> str:
-    """様々な形式の日付文字列を 'YYYY/MM/DD HH:MM' に正規化する"""
-    if not isinstance(date_str, str) or not date_str.strip():
-        return ""
-
-    s = unicodedata.normalize("NFKC", date_str)
-    s = re.sub(r'\s*\([月火水木金土日]\)\s*', ' ', s).strip()
-
-    now = jst_now()
-    dt_obj = None
-
-    formats_to_try = [
-        "%Y/%m/%d %H:%M",
-        "%m/%d %H:%M"
-    ]
+WEEKDAY_RE = re.compile(r'\s*\([月火水木金土日]\)\s*')
 
-    for fmt in formats_to_try:
-        try:
-            dt_obj = datetime.strptime(s, fmt)
-            if "%Y" not in fmt:
-                dt_obj = dt_obj.replace(year=now.year)
-                if dt_obj.replace(tzinfo=now.tzinfo) > now:
-                    dt_obj = dt_obj.replace(year=now.year - 1)
-            break
-        except (ValueError, TypeError):
-            continue
+def normalize_date_series(dates: pd.Series) -> pd.Series:
+    """様々な形式の日付文字列を 'YYYY/MM/DD HH:MM' にまとめて正規化する"""
+    fmt = "%Y/%m/%d %H:%M"
+    s = dates.fillna("").astype(str).map(lambda x: unicodedata.normalize("NFKC", x))
+    s = s.str.replace(WEEKDAY_RE, " ", regex=True).str.strip()
 
-    if dt_obj:
-        return dt_obj.strftime("%Y/%m/%d %H:%M")
+    dt = pd.to_datetime(s, format=fmt, errors="coerce", cache=True)
+    # 既存Excelの日時セルは文字列化すると 'YYYY-MM-DD HH:MM:SS' になる
+    dt = dt.fillna(pd.to_datetime(s, format="%Y-%m-%d %H:%M:%S", errors="coerce", cache=True))
 
-    return s # どの形式にも一致しない場合は元の文字列を返す
+    # 年のない 'MM/DD HH:MM' は今年とみなし、未来になる場合は前年とする
+    now = jst_now().replace(tzinfo=None)
+    no_year = dt.isna() & (s != "")
+    if no_year.any():
+        md = s[no_year]
+        dt_md = pd.to_datetime(f"{now.year}/" + md, format=fmt, errors="coerce", cache=True)
+        future = dt_md > now
+        if future.any():
+            dt_md[future] = pd.to_datetime(f"{now.year - 1}/" + md[future], format=fmt, errors="coerce", cache=True)
+        dt[no_year] = dt_md
 
-def make_driver() -> webdriver.Chrome:
-    opts = Options()
-    chrome_path = os.getenv("CHROME_PATH")
-    if chrome_path:
-        opts.binary_location = chrome_path
-    opts.add_argument("--headless=new")
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--window-size=1280,2000")
-    opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
+    # どの形式にも一致しない場合は元の文字列を返す
+    return dt.dt.strftime(fmt).where(dt.notna(), s)
 
 DATE_RE = re.compile(r"(?:\\d{4}/\\d{1,2}/\\d{1,2}|\\d{1,2}/\\d{1,2})\\s*\\d{1,2}[:：]\\d{2}")
+PAREN_RE = re.compile(r"[（(][^）)]+[）)]")
+LEADING_NUM_RE = re.compile(r"^\d+\s*")
+MULTI_SPACE_RE = re.compile(r"\s{2,}")
+NEWS_ITEM_SELECTOR = 'li[class*="sc-1u4589e-0"]'
+TITLE_SELECTOR = 'div[class*="sc-3ls169-0"]'
+# 引用元の候補セレクタ（上から順に試す）
+SOURCE_SELECTORS = (
+    "div.sc-n3vj8g-0.yoLqH div.sc-110wjhy-8.bsEjY span",
+    "div.sc-n3vj8g-0.yoLqH",
+    "span",
+    "div",
+)
 
 def clean_source_text(text: str) -> str:
     if not text:
         return ""
     t = text
-    t = re.sub(r"[（(][^）)]+[）)]", "", t)
-    t = DATE_RE.sub("", t)
-    t = re.sub(r"^\d+\s*", "", t)
-    t = re.sub(r"\s{2,}", " ", t).strip()
+    # 数字も括弧も含まない媒体名（大半のケース）は括弧・日付・先頭番号の除去を省く
+    if any(c.isdigit() or c in "()（）" for c in t):
+        t = PAREN_RE.sub("", t)
+        t = DATE_RE.sub("", t)
+        t = LEADING_NUM_RE.sub("", t)
+    t = MULTI_SPACE_RE.sub(" ", t).strip()
     return t
 
 def scrape_yahoo(keyword: str) -> pd.DataFrame:
-    driver = make_driver()
     url = (
         f"https://news.yahoo.co.jp/search?p={keyword}"
         f"&ei=utf-8&categories=domestic,world,business,it,science,life,local"
     )
-    driver.get(url)
-    time.sleep(5)
+    cols = ["タイトル", "URL", "投稿日", "引用元", "取得日時", "検索キーワード", "ポジネガ", "カテゴリ", "重複確認用タイトル"]
+    r = HTTP_SESSION.get(url, headers={"User-Agent": USER_AGENT}, timeout=10)
+    if r.status_code != 200:
+        print(f"⚠️ {keyword}: Yahoo検索の取得に失敗 ({r.status_code})。新規 0 件として続行します。")
+        return pd.DataFrame(columns=cols)
 
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    driver.quit()
+    # Lexbor (C 実装) でページ全体をパースし、CSS セレクタで結果の <li> を拾う
+    tree = LexborHTMLParser(r.content)
 
-    items = soup.find_all("li", class_=re.compile("sc-1u4589e-0"))
-    rows = []
+    items = tree.css(NEWS_ITEM_SELECTOR)
+    fetched_at = jst_str()
+    titles, urls, dates, sources, dup_titles = [], [], [], [], []
     for li in items:
-        try:
-            title_tag = li.find("div", class_=re.compile("sc-3ls169-0"))
-            link_tag = li.find("a", href=True)
-            time_tag = li.find("time")
-
-            title = title_tag.get_text(strip=True) if title_tag else ""
-            url = link_tag["href"] if link_tag else ""
-            date_str = time_tag.get_text(strip=True) if time_tag else ""
-
-            pub_date = normalize_date_str(date_str) if date_str else "取得不可"
-
-            source = ""
-            for sel in [
-                "div.sc-n3vj8g-0.yoLqH div.sc-110wjhy-8.bsEjY span",
-                "div.sc-n3vj8g-0.yoLqH",
-                "span",
-                "div",
-            ]:
-                el = li.select_one(sel)
-                if not el:
-                    continue
-                raw = el.get_text(" ", strip=True)
-                txt = clean_source_text(raw)
-                if txt and not txt.isdigit():
-                    source = txt
-                    break
-
-            normalized_title = normalize_title_for_dup(title)
-
-            if title and url:
-                rows.append({
-                    "タイトル": title, "URL": url, "投稿日": pub_date, "引用元": source or "Yahoo",
-                    "取得日時": jst_str(), "検索キーワード": keyword,
-                    "ポジネガ": "", "カテゴリ": "", "重複確認用タイトル": normalized_title,
-                })
-        except Exception:
+        title_tag = li.css_first(TITLE_SELECTOR)
+        link_tag = li.css_first("a[href]")
+        time_tag = li.css_first("time")
+
+        title = title_tag.text(strip=True) if title_tag else ""
+        url = (link_tag.attributes.get("href") or "") if link_tag else ""
+        if not (title and url):
             continue
-    return pd.DataFrame(rows, columns=["タイトル", "URL", "投稿日", "引用元", "取得日時", "検索キーワード", "ポジネガ", "カテゴリ", "重複確認用タイトル"])
+        date_str = time_tag.text(strip=True) if time_tag else ""
+
+        source = ""
+        for sel in SOURCE_SELECTORS:
+            el = li.css_first(sel)
+            if not el:
+                continue
+            # 空白だけのテキストノードも区切りとして残るので、先頭・末尾の空白を落とす
+            raw = el.text(separator=" ", strip=True).strip()
+            txt = clean_source_text(raw)
+            if txt and not txt.isdigit():
+                source = txt
+                break
+
+        titles.append(title)
+        urls.append(url)
+        dates.append(date_str)
+        sources.append(source or "Yahoo")
+        dup_titles.append(normalize_title_for_dup(title))
+
+    df = pd.DataFrame({
+        "タイトル": titles, "URL": urls, "投稿日": dates, "引用元": sources,
+        "取得日時": fetched_at, "検索キーワード": keyword,
+        "ポジネガ": "", "カテゴリ": "", "重複確認用タイトル": dup_titles,
+    }, columns=cols)
+    df["投稿日"] = normalize_date_series(df["投稿日"]).where(df["投稿日"] != "", "取得不可")
+    return df
 
 def download_existing_book(repo: str, tag: str, asset_name: str, token: str) -> dict[str, pd.DataFrame]:
     empty_cols = ["タイトル", "URL", "投稿日", "引用元", "取得日時", "検索キーワード", "ポジネガ", "カテゴリ", "重複確認用タイトル"]
@@ -202,12 +224,12 @@ def download_existing_book(repo: str, tag: str, asset_name: str, token: str) ->
     if token:
         headers["Authorization"] = f"Bearer {token}"
     url_rel = f"{base}/repos/{repo}/releases/tags/{tag}"
-    r = requests.get(url_rel, headers=headers)
+    r = HTTP_SESSION.get(url_rel, headers=headers, timeout=(3, 10))
     print(f"🔎 GET {url_rel} -> {r.status_code}")
     if r.status_code != 200:
         print("⚠️ Releaseが見つからないか、取得に失敗。既存は空として続行します。")
         return dfs
-    rel = r.json()
+    rel = orjson.loads(r.content) if orjson is not None else r.json()
     asset = next((a for a in rel.get("assets", []) if a.get("name") == asset_name), None)
     if not asset:
         print(f"⚠️ Releaseに {asset_name} が存在しません。既存は空として続行します。")
@@ -216,79 +238,80 @@ def download_existing_book(repo: str, tag: str, asset_name: str, token: str) ->
     if not dl_url:
         print("⚠️ browser_download_url が見つかりません。既存は空として続行します。")
         return dfs
-    dr = requests.get(dl_url)
-    print(f"⬇️  Download {dl_url} -> {dr.status_code}, {len(dr.content)} bytes")
+    bio = io.BytesIO()
+    with HTTP_SESSION.get(dl_url, stream=True, timeout=(3, 30)) as dr:
+        if dr.status_code == 200:
+            # .content に全体を溜めず、チャンク単位で BytesIO へ書き込む
+            dr.raw.decode_content = True
+            shutil.copyfileobj(dr.raw, bio, length=64 * 1024)
+    print(f"⬇️  Download {dl_url} -> {dr.status_code}, {bio.tell()} bytes")
     if dr.status_code != 200:
         print("⚠️ 既存Excelのダウンロードに失敗。既存は空として続行します。")
         return dfs
-    with io.BytesIO(dr.content) as bio:
+    bio.seek(0)
+    with bio:
         try:
-            book = pd.read_excel(bio, sheet_name=None, dtype=str)
+            # read_only: セルオブジェクトを作らず行タプルを順に読むだけにする
+            wb = openpyxl.load_workbook(bio, read_only=True, data_only=True)
         except Exception as e:
             print(f"⚠️ 既存Excelの読み込みに失敗: {e}")
             return dfs
-    for sn in SHEET_NAMES:
-        if sn in book:
-            df = book[sn]
-            for col in empty_cols:
-                if col not in df.columns:
-                    df[col] = ""
-            dfs[sn] = df[empty_cols].copy()
+        try:
+            for sn in SHEET_NAMES:
+                if sn not in wb.sheetnames:
+                    continue
+                rows = wb[sn].iter_rows(values_only=True)
+                header = next(rows, None) or ()
+                # 必要な列だけを読み取り時に拾う（存在しない列は空文字）
+                pos: dict = {}
+                for i, h in enumerate(header):
+                    pos.setdefault(h, i)
+                pick = [pos.get(col) for col in empty_cols]
+                records = [
+                    tuple("" if i is None else (r[i] if i < len(r) else None) for i in pick)
+                    for r in rows if any(v is not None for v in r)
+                ]
+                dfs[sn] = pd.DataFrame(records, columns=empty_cols, dtype=str)
+        finally:
+            wb.close()
     return dfs
 
 def save_book_with_format(dfs: dict[str, pd.DataFrame], path: str):
-    from openpyxl import Workbook
-    from openpyxl.utils import get_column_letter
-    from openpyxl.styles import Font, Alignment
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
 
-    wb = Workbook()
-    default_ws = wb.active
-    if default_ws:
-      wb.remove(default_ws)
+    # constant_memory: 行を書いた順にディスクへ流すので大きな履歴でもメモリが増えない
+    # strings_to_urls: URL列はハイパーリンクにせず文字列のまま書く（リンク数・長さの上限で欠落しないように）
+    wb = xlsxwriter.Workbook(path, {
+        "constant_memory": True, "default_date_format": "yyyy/m/d h:mm", "strings_to_urls": False,
+    })
+    header_format = wb.add_format({"bold": True, "valign": "vcenter"})
+    headers = ["タイトル", "URL", "投稿日", "引用元", "取得日時", "検索キーワード", "ポジネガ", "カテゴリ", "重複確認用タイトル"]
+    widths = [50, 60, 16, 24, 16, 16, 16, 16, 16]
 
     for sheet_name, df in dfs.items():
-        ws = wb.create_sheet(title=sheet_name)
-        headers = ["タイトル", "URL", "投稿日", "引用元", "取得日時", "検索キーワード", "ポジネガ", "カテゴリ", "重複確認用タイトル"]
-        ws.append(headers)
-        
+        ws = wb.add_worksheet(sheet_name)
+        ws.write_row(0, 0, headers, header_format)
+        for i, wdt in enumerate(widths):
+            ws.set_column(i, i, wdt)
+
+        row_idx = 0
         if not df.empty:
-            for row in df.itertuples(index=False):
-                new_row = list(row)
-                try:
-                    if pd.notna(row.投稿日):
-                        dt_obj = pd.to_datetime(row.投稿日, errors='coerce')
-                        if not pd.isna(dt_obj):
-                            new_row[2] = dt_obj
-                except Exception:
-                    pass
-                ws.append(new_row)
-
-        max_col = ws.max_column
-        max_row = ws.max_row
-        ws.auto_filter.ref = f"A1:{get_column_letter(max_col)}{max_row}"
-
-        header_font = Font(bold=True)
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.alignment = Alignment(vertical="center")
-
-        widths = {
-            "A": 50, "B": 60, "C": 16, "D": 24, "E": 16,
-            "F": 16, "G": 16, "H": 16, "I": 16,
-        }
-        for col, wdt in widths.items():
-            if ws.max_column >= ord(col) - 64:
-                ws.column_dimensions[col].width = wdt
-
-        ws.freeze_panes = "A2"
-
-        for row in ws.iter_rows(min_row=2, min_col=3, max_col=3):
-            for cell in row:
-                if isinstance(cell.value, datetime):
-                    cell.number_format = 'yyyy/m/d h:mm'
+            # 投稿日は列ごとまとめて日時に変換し、変換できないもの（取得不可など）は文字列のまま書く
+            dates = pd.to_datetime(df["投稿日"], format="%Y/%m/%d %H:%M", errors="coerce", cache=True)
+            df = df.astype(object)
+            df["投稿日"] = dates.astype(object).where(dates.notna(), df["投稿日"])
+            # xlsxwriter は NaN を書けないので空セル (None) にする
+            df = df.where(df.notna(), None)
+            for row in df.itertuples(index=False, name=None):
+                row_idx += 1
+                ws.write_row(row_idx, 0, row)
 
-    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    wb.save(path)
+        ws.autofilter(0, 0, row_idx, len(headers) - 1)
+        ws.freeze_panes(1, 0)
+
+    wb.close()
+
+GEMINI_JSON_RE = re.compile(r'(\\[.*\\].*})', flags=re.DOTALL)
 
 def classify_with_gemini(dfs: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
     api_key = os.getenv("GEMINI_API_KEY", "").strip()
@@ -327,56 +350,71 @@ def classify_with_gemini(dfs: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame
 - 入力の「タイトル」文字列は一切変更しないこと（出力には含めなくて良い）。
 """.strip()
 
-    classified_dfs = {}
+    # まず全シートのバッチを洗い出し、Gemini 呼び出しだけを並行して行う
+    jobs = []
     for sheet_name, df in dfs.items():
         df_to_classify = df[(df["ポジネガ"] == "") | (df["カテゴリ"] == "")]
 
         if df_to_classify.empty:
             print(f"ℹ {sheet_name}: 分類対象の行はありません。")
-            classified_dfs[sheet_name] = df
             continue
 
         print(f"✨ {sheet_name}: {len(df_to_classify)}件をGeminiで分類します。")
-        df_to_classify = df_to_classify.reset_index(drop=True)
+        targets = df_to_classify.index  # 応答の row 番号 → 元の行ラベル
+        titles = df_to_classify["タイトル"].tolist()
 
         batch_size = 40
-        for start in range(0, len(df_to_classify), batch_size):
-            batch = df_to_classify.iloc[start:start + batch_size]
-            payload = [{"row": i, "title": t} for i, t in batch.loc[:, ["タイトル"]].itertuples(index=True)]
+        for start in range(0, len(titles), batch_size):
+            payload = [{"row": i, "title": t} for i, t in enumerate(titles[start:start + batch_size], start)]
+            prompt = system_prompt + "\n\n" + json.dumps(payload, ensure_ascii=False, indent=2)
+            jobs.append((sheet_name, targets, len(payload), prompt))
+
+    def request_batch(prompt: str):
+        retries = 3
+        for attempt in range(retries):
+            try:
+                resp = model.generate_content(prompt)
+                text = (resp.text or "").strip()
+
+                m = GEMINI_JSON_RE.search(text)
+                json_text = m.group(1) if m else text
+                return json.loads(json_text)
+            except Exception as e:
+                print(f"⚠ Gemini API呼び出しに失敗: {e} (再試行 {attempt + 1}/{retries})")
+                time.sleep(5)  # 5秒待機してから再試行
+        # 3回再試行しても失敗した場合
+        return None
+
+    if not jobs:
+        return dfs
 
-            retries = 3
-            for attempt in range(retries):
+    # 行ラベル → (ポジネガ, カテゴリ) を集めておき、シートごとに1回でまとめて書き込む
+    updates: dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=GEMINI_WORKERS) as ex:
+        results = ex.map(request_batch, [job[3] for job in jobs])
+        for (sheet_name, targets, n, _), result in zip(jobs, results):
+            if result is None:
+                print(f"❌ {sheet_name}: {n}件の分類に失敗しました。")
+                continue
+            sheet_updates = updates.setdefault(sheet_name, {})
+            for obj in result:
                 try:
-                    prompt = system_prompt + "\n\n" + json.dumps(payload, ensure_ascii=False, indent=2)
-                    resp = model.generate_content(prompt)
-                    text = (resp.text or "").strip()
-
-                    import regex as re_u
-                    m = re_u.search(r'(\\[.*\\].*})', text, flags=re_u.DOTALL)
-                    json_text = m.group(1) if m else text
-                    result = json.loads(json_text)
-
-                    for obj in result:
-                        try:
-                            idx = int(obj.get("row"))
-                            sentiment = str(obj.get("sentiment", "")).strip()
-                            category = str(obj.get("category", "")).strip()
-                            if sentiment and category:
-                                df.loc[df_to_classify.index[idx], "ポジネガ"] = sentiment
-                                df.loc[df_to_classify.index[idx], "カテゴリ"] = category
-                        except Exception as e:
-                            print(f"⚠ Gemini応答の解析に失敗: {e}")
-                    # 成功した場合はループを抜ける
-                    break
+                    idx = int(obj.get("row"))
+                    sentiment = str(obj.get("sentiment", "")).strip()
+                    category = str(obj.get("category", "")).strip()
+                    if sentiment and category:
+                        sheet_updates[targets[idx]] = (sentiment, category)
                 except Exception as e:
-                    print(f"⚠ Gemini API呼び出しに失敗: {e} (再試行 {attempt + 1}/{retries})")
-                    time.sleep(5)  # 5秒待機してから再試行
-            else:
-                # 3回再試行しても失敗した場合
-                print(f"❌ {sheet_name}: {batch_size}件の分類に失敗しました。")
-                
-        classified_dfs[sheet_name] = df
-    return classified_dfs
+                    print(f"⚠ Gemini応答の解析に失敗: {e}")
+
+    for sheet_name, sheet_updates in updates.items():
+        if not sheet_updates:
+            continue
+        df = dfs[sheet_name]
+        labels = list(sheet_updates)
+        df.loc[labels, "ポジネガ"] = [v[0] for v in sheet_updates.values()]
+        df.loc[labels, "カテゴリ"] = [v[1] for v in sheet_updates.values()]
+    return dfs
 
 def main():
     keywords = get_keywords()
@@ -384,7 +422,12 @@ def main():
 
     token = os.getenv("GITHUB_TOKEN", "")
     repo = os.getenv("GITHUB_REPOSITORY", "")
-    dfs_old = download_existing_book(repo, RELEASE_TAG, ASSET_NAME, token)
+    # 既存Excelの取得とキーワードごとのYahoo検索はどれもネットワーク待ちなので並行して実行する
+    # （Yahoo 側の制限を考えて同時検索数は SCRAPE_WORKERS 程度に抑える）
+    with ThreadPoolExecutor(max_workers=min(len(keywords), SCRAPE_WORKERS) + 1) as ex:
+        fut_old = ex.submit(download_existing_book, repo, RELEASE_TAG, ASSET_NAME, token)
+        dfs_new = dict(zip(keywords, ex.map(scrape_yahoo, keywords)))
+        dfs_old = fut_old.result()
 
     dfs_merged: dict[str, pd.DataFrame] = {}
     for kw in keywords:
@@ -392,20 +435,24 @@ def main():
         
         # 既存データの投稿日を正規化
         if not df_old.empty:
-            df_old['投稿日'] = df_old['投稿日'].astype(str).apply(normalize_date_str)
+            df_old['投稿日'] = normalize_date_series(df_old['投稿日'])
 
-        df_new = scrape_yahoo(kw)
+        df_new = dfs_new[kw]
 
         # 既存データと新規データの重複確認用タイトルを再生成
         df_old["重複確認用タイトル"] = df_old["タイトル"].apply(normalize_title_for_dup)
         df_new["重複確認用タイトル"] = df_new["タイトル"].apply(normalize_title_for_dup)
 
-        df_old['投稿日'] = df_old['投稿日'].astype(str)
-        df_new['投稿日'] = df_new['投稿日'].astype(str)
-        
-        df_all = pd.concat([df_old, df_new], ignore_index=True)
-        if not df_all.empty:
-            df_all = df_all.dropna(subset=["URL"]).drop_duplicates(subset=["URL"], keep="first")
+        # 既存を優先し、既存にないURLの新規行だけを後ろに足す
+        # （既存は前回保存時に重複排除済みなので、行ごとに見るのは新規側だけでよい）
+        is_new = ~df_new["URL"].isin(df_old["URL"]) & ~df_new["URL"].duplicated()
+        df_new_only = df_new[is_new]
+        if df_new_only.empty:
+            df_all = df_old.reset_index(drop=True)
+        elif df_old.empty:
+            df_all = df_new_only.reset_index(drop=True)
+        else:
+            df_all = pd.concat([df_old, df_new_only], ignore_index=True)
         dfs_merged[kw] = df_all
         print(f"  - {kw}: 既存 {len(df_old)} 件 + 新規 {len(df_new)} 件 → 合計 {len(df_all)} 件")
 